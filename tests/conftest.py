@@ -1,63 +1,159 @@
+import asyncio
 import socket
 import subprocess
+import sys
 import time
 import pytest
 import signal
+import errno
+import functools
 import os
-from contextlib import contextmanager
+import random
+import re
+import select
+import selectors
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager
 
 
-def wait_for_port(host, port, timeout=10):
-    """Wait for a port to become available."""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(1)
-                result = sock.connect_ex((host, port))
-                if result == 0:
-                    return True
-        except socket.error:
-            pass
-        time.sleep(0.1)
-    return False
+@functools.lru_cache(maxsize=None)
+def _resolve(host, port):
+    """Resolve `host` to an IPv4 address once, instead of on every connection attempt."""
+    return socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)[0][4]
+
+
+def _worker_port():
+    # Each pytest-xdist worker gets its own server port, 10 apart so that level 01's
+    # neighbouring-port checks never see another worker's server. A plain run uses 4221.
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    return 4221 + 10 * int(worker[len("gw"):])
+
+
+SERVER_PORT = _worker_port()
+# Address of the server under test, resolved once at import.
+SERVER_ADDR = _resolve('localhost', SERVER_PORT)
+
+
+# What a non-blocking connect_ex returns while the handshake is still under way;
+# Windows reports WSAEWOULDBLOCK instead of EINPROGRESS.
+_CONNECT_PENDING = {errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", None)} - {None}
+
+
+def _connect_probe(addr, selector, timeout):
+    """Make one non-blocking connect to `addr`; True if the handshake completes within `timeout`."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setblocking(False)
+        result = sock.connect_ex(addr)
+        if result in _CONNECT_PENDING:
+            selector.register(sock, selectors.EVENT_WRITE)
+            try:
+                ready = selector.select(timeout=timeout)
+            finally:
+                selector.unregister(sock)
+            if not ready:
+                return False
+            result = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        return result == 0
+
+
+def wait_for_port(host, port, timeout=10, process=None):
+    """Wait for a port to become available, backing off exponentially between attempts.
+
+    Each attempt is a non-blocking connect whose outcome the selector reports, so a
+    slow handshake is waited on by the kernel rather than by polling.
+    If `process` is given, stop waiting as soon as it has exited.
+    """
+    addr = _resolve(host, port)
+    backoff = 0.001
+    deadline = time.monotonic() + timeout
+    with ExitStack() as stack:
+        selector = stack.enter_context(selectors.DefaultSelector())
+        pidfd = None
+        if process is not None and hasattr(os, "pidfd_open"):
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except OSError:
+                pass
+            else:
+                stack.callback(os.close, pidfd)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if process is not None and process.poll() is not None:
+                return False
+            if _connect_probe(addr, selector, remaining):
+                return True
+            # Refused: the server hasn't bound yet. Jitter keeps the retries from
+            # falling into lockstep with the server's bind.
+            delay = min(backoff * (1 + random.random() * 0.1), max(0, deadline - time.monotonic()))
+            if pidfd is None:
+                time.sleep(delay)
+            else:
+                # The pidfd turns readable when the server exits, cutting the back-off short
+                selector.register(pidfd, selectors.EVENT_READ)
+                try:
+                    selector.select(timeout=delay)
+                finally:
+                    selector.unregister(pidfd)
+            backoff = min(0.05, backoff * 2.0)
 
 
 def is_port_in_use(host, port):
     """Check if a port is already in use."""
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            sock.settimeout(1)
-            result = sock.connect_ex((host, port))
-            return result == 0
+        with selectors.DefaultSelector() as selector:
+            return _connect_probe(_resolve(host, port), selector, 1)
     except socket.error:
         return False
 
 
+def _port_is_free(host, port):
+    """Check the port by binding it, so no running server has to accept a probe connection."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(_resolve(host, port))
+        except OSError:
+            return False
+    return True
+
+
 # Add this to your existing conftest.py
 
 @contextmanager
-def http_server_process(directory=None):
-    """Context manager to start and stop the HTTP server process with optional directory."""
-    if is_port_in_use('localhost', 4221):
-        pytest.fail("Port 4221 is already in use. Please stop any existing servers.")
+def _start_server(directory=None, capture_output=False):
+    """Start the server process and stop it on exit; output is discarded unless captured."""
+    if not _port_is_free(*SERVER_ADDR):
+        pytest.fail(f"Port {SERVER_PORT} is already in use. Please stop any existing servers.")
     
     process = None
     try:
-        cmd = ['python3', 'main.py']
+        # pytest's own interpreter: no PATH lookup, and no shell-script shim (pyenv) in front of it
+        cmd = [sys.executable, 'main.py']
         if directory:
             cmd.extend(['--directory', directory])
+        if SERVER_PORT != 4221:
+            # Only parallel workers need this; the server must then accept --port.
+            cmd.extend(['--port', str(SERVER_PORT)])
         
         process = subprocess.Popen(
             cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            preexec_fn=os.setsid if hasattr(os, 'setsid') else None
+            stdout=subprocess.PIPE if capture_output else subprocess.DEVNULL,
+            stderr=subprocess.PIPE if capture_output else subprocess.DEVNULL,
+            start_new_session=True
         )
         
-        if not wait_for_port('localhost', 4221, timeout=10):
+        if not wait_for_port(*SERVER_ADDR, timeout=10, process=process):
+            exit_code = process.poll()
             stdout, stderr = process.communicate(timeout=2)
-            error_msg = f"Server failed to start listening on port 4221 within 10 seconds"
+            if exit_code is None:
+                error_msg = f"Server failed to start listening on port {SERVER_PORT} within 10 seconds"
+            else:
+                error_msg = f"Server exited with code {exit_code} before listening on port {SERVER_PORT}"
+                if stderr and b"Address already in use" in stderr:
+                    error_msg += f" (port {SERVER_PORT} is already in use)"
             if stderr:
                 error_msg += f"\nServer stderr: {stderr.decode()}"
             if stdout:
@@ -69,7 +165,8 @@ def http_server_process(directory=None):
     except subprocess.TimeoutExpired:
         pytest.fail("Server process timed out during startup")
     except FileNotFoundError:
-        pytest.fail("Could not start server: python3 not found or main.py missing")
+        # A missing main.py isn't this: the interpreter starts and exits with code 2
+        pytest.fail(f"Could not start server: interpreter {sys.executable} not found")
     finally:
         if process:
             try:
@@ -89,56 +186,403 @@ def http_server_process(directory=None):
             except (ProcessLookupError, OSError):
                 pass
 
-# Add binary mode support to send_http_request
-def send_http_request(method, path=None, headers=None, body=None, timeout=5, binary=False):
-    """Send HTTP request and return response (as text or binary)."""
+
+@contextmanager
+def http_server_process(directory=None, capture_output=False):
+    """Context manager to start and stop the HTTP server process with optional directory.
+
+    The server's stdout/stderr are piped back only with `capture_output=True`;
+    otherwise they go to /dev/null so nothing has to drain them.
+    """
+    # A fresh server needs the port, so release the shared one first.
+    _shared_server.stop()
+    with _start_server(directory, capture_output) as process:
+        yield process
+
+
+class _SharedServer:
+    """Keep one server process alive across tests instead of spawning one per test.
+
+    The process is only restarted when a test asks for a different `--directory`
+    or when the previous one has exited. Its output is discarded: nothing reads it
+    while it runs, and a full pipe would block a long-lived server.
+    """
+
+    def __init__(self):
+        self._stack = None
+        self._process = None
+        self._directory = None
+
+    def get(self, directory=None):
+        if self._process is not None:
+            if self._directory != directory or self._process.poll() is not None:
+                self.stop()
+        if self._process is None:
+            stack = ExitStack()
+            self._process = stack.enter_context(_start_server(directory))
+            self._stack = stack
+            self._directory = directory
+        return self._process
+
+    def stop(self):
+        if self._stack is not None:
+            stack, self._stack, self._process = self._stack, None, None
+            stack.close()
+
+
+_shared_server = _SharedServer()
+
+
+def pytest_configure(config):
+    # Registered here so the marker is known even when pytest-xdist isn't installed.
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run these tests on one pytest-xdist worker under --dist loadgroup"
+    )
+    config.addinivalue_line(
+        "markers", "file_io: tests that read or write files in the served directory"
+    )
+
+
+def pytest_sessionfinish(session, exitstatus):
+    _shared_server.stop()
+    if _event_loop is not None:
+        _event_loop.close()
+
+
+@pytest.fixture
+def server():
+    """Running server process shared with every other test using this fixture."""
+    return _shared_server.get()
+
+
+# RAM-backed on Linux, so the server's writes and the tests' readbacks never wait on a disk.
+_SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+
+@pytest.fixture(scope="module")
+def module_tmpdir(tmp_path_factory):
+    """Temporary directory shared by every test in a module, in tmpfs where available."""
+    if _SHM_DIR is None:
+        yield str(tmp_path_factory.mktemp("files"))
+        return
+    with tempfile.TemporaryDirectory(dir=_SHM_DIR) as temp_dir:
+        yield temp_dir
+
+
+@pytest.fixture
+def server_with_tmpdir(module_tmpdir):
+    """Shared server process started with `--directory` set to the module's temporary directory."""
+    return _shared_server.get(directory=module_tmpdir)
+
+
+@pytest.fixture
+def fresh_server():
+    """Dedicated server process for tests that inspect its exit status or output."""
+    with http_server_process(capture_output=True) as process:
+        yield process
+
+
+# Matches one whole header line; the search stops at the end of the headers, where
+# the last line has no trailing CRLF.
+_CONTENT_LENGTH = re.compile(rb'(?im)^content-length:[ \t]*(\d+)[ \t]*(?:\r\n|\Z)')
+
+
+# One receive buffer per thread, reused (and kept at its grown size) across responses
+_recv_buffers = threading.local()
+
+
+def _recv_response(sock, keep_alive=False):
+    """Read one HTTP response from `sock`.
+
+    A response without Content-Length is read until the server closes the connection,
+    except on a keep-alive connection, where it can only mean an empty body.
+    Headers are parsed once, as soon as the blank line after them has arrived.
+    """
+    buf = getattr(_recv_buffers, 'buf', None)
+    if buf is None:
+        buf = _recv_buffers.buf = bytearray(8192)
+    mv = memoryview(buf)
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            sock.settimeout(timeout)
-            sock.connect(('localhost', 4221))
-            
-            # Build request
-            request_lines = [f"{method} {path} HTTP/1.1"]
-            request_lines.append("Host: localhost:4221")
-            
-            if headers:
-                for header, value in headers.items():
-                    request_lines.append(f"{header}: {value}")
-            
-            request_lines.append("")  # Empty line before body
-            
-            if body:
-                request_lines.append(body)
-            
-            request = "\r\n".join(request_lines)
-            if not body:
-                request += "\r\n"
-            
-            sock.sendall(request.encode())
-            
-            # Receive response
-            response = b""
-            while True:
-                try:
-                    chunk = sock.recv(4096)
-                    if not chunk:
-                        break
-                    response += chunk
-                    # Stop if we have a complete HTTP response
-                    if b'\r\n\r\n' in response:
-                        if b"Content-Length:" in response:
-                            # For responses with content, read until we have all content
-                            headers_part, body_part = response.split(b'\r\n\r\n', 1)
-                            content_length = 0
-                            for line in headers_part.split(b'\r\n'):
-                                if line.lower().startswith(b'content-length:'):
-                                    content_length = int(line.split(b':')[1].strip())
-                                    break
-                            if len(body_part) >= content_length:
-                                break
-                except socket.timeout:
-                    break
-            
-            return response if binary else response.decode('utf-8', errors='ignore')
+        end = 0
+        expected = None  # Total response size, once the headers tell us
+        while expected is None or end < expected:
+            if end == len(buf):
+                mv.release()
+                buf.extend(bytes(len(buf)))
+                mv = memoryview(buf)
+            try:
+                n = sock.recv_into(mv[end:])
+            except socket.timeout:
+                break
+            if not n:
+                break
+            search_from = max(0, end - 3)
+            end += n
+            if expected is None:
+                header_end = buf.find(b'\r\n\r\n', search_from, end)
+                if header_end != -1:
+                    match = _CONTENT_LENGTH.search(buf, 0, header_end)
+                    if match:
+                        expected = header_end + 4 + int(match.group(1))
+                    elif keep_alive:
+                        expected = header_end + 4
+        return bytes(mv[:end])
+    finally:
+        # A leftover export would stop the next response from growing the shared buffer
+        mv.release()
+
+
+def _connect(host, port, timeout):
+    sock = socket.create_connection(_resolve(host, port), timeout=timeout)
+    # Requests are one small write each; don't let Nagle hold them back.
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+class HttpClient:
+    """Keep-alive connection to the server, reused across requests from the thread that owns it.
+
+    The connection is reopened whenever the server has closed it or left unexpected
+    bytes on it, so servers without keep-alive support still get one request per connection.
+    This stays on a raw socket rather than http.client.HTTPConnection: tests compare the
+    exact response bytes, which http.client parses away, and its parser is no faster.
+    """
+
+    def __init__(self, host='localhost', port=SERVER_PORT, timeout=5):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.owner = threading.get_ident()
+        self._sock = None
+
+    def _is_reusable(self):
+        # Readable while idle means the peer either closed or sent data we did not ask for.
+        readable, _, _ = select.select([self._sock], [], [], 0)
+        return not readable
+
+    def request(self, request):
+        """Send raw request bytes and return the raw response bytes."""
+        if self._sock is not None and not self._is_reusable():
+            self.close()
+        if self._sock is not None:
+            try:
+                self._sock.sendall(request)
+                response = _recv_response(self._sock, keep_alive=True)
+            except socket.error:
+                response = b""
+            if response:
+                return response
+            # The server dropped the idle connection under us; retry once on a new one.
+            self.close()
+        self._sock = _connect(self.host, self.port, self.timeout)
+        self._sock.sendall(request)
+        return _recv_response(self._sock, keep_alive=True)
+
+    def close(self):
+        if self._sock is not None:
+            sock, self._sock = self._sock, None
+            sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_http_client = None
+
+
+@pytest.fixture
+def http_client():
+    """Send this test's `send_http_request` calls over one keep-alive `HttpClient`."""
+    global _http_client
+    with HttpClient() as client:
+        _http_client = client
+        try:
+            yield client
+        finally:
+            _http_client = None
+
+
+def _build_request(method, path, headers, body, keep_alive):
+    request_lines = [f"{method} {path} HTTP/1.1"]
+    request_lines.append(f"Host: localhost:{SERVER_PORT}")
+
+    if headers:
+        for header, value in headers.items():
+            request_lines.append(f"{header}: {value}")
+    if keep_alive and not any(h.lower() == "connection" for h in headers or ()):
+        request_lines.append("Connection: keep-alive")
+
+    # Empty line before body
+    request = ("\r\n".join(request_lines) + "\r\n\r\n").encode()
+    if body:
+        request += body if isinstance(body, bytes) else body.encode()
+    return request
+
+
+def _request_key(method, path, headers, body, keep_alive):
+    return method, path, tuple(headers.items()) if headers else None, body or None, keep_alive
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_request(method, path, headers, body, keep_alive):
+    # Parametrized tests resend the same request many times; encode each one once.
+    return _build_request(method, path, dict(headers) if headers else None, body, keep_alive)
+
+
+def send_http_request(method, path=None, headers=None, body=None, timeout=5):
+    """Send HTTP request and return the raw response bytes.
+
+    Inside a test using the `http_client` fixture, requests from the test's own thread
+    reuse its keep-alive connection; everything else gets a one-shot socket. A complete
+    raw request passed as `method` (no `path`) always gets its own socket, since
+    whatever the server makes of the trailing request line can't be framed.
+    """
+    client = _http_client
+    if path is None or client is None or client.owner != threading.get_ident():
+        client = None
+
+    keep_alive = client is not None
+    request = _cached_request(*_request_key(method, path, headers, body, keep_alive))
+
+    try:
+        if client:
+            response = client.request(request)
+        else:
+            with _connect(*SERVER_ADDR, timeout) as sock:
+                sock.sendall(request)
+                response = _recv_response(sock)
+    except socket.error as e:
+        pytest.fail(f"Failed to send HTTP request: {e}")
+
+    return response
+
+
+def raw_connection(timeout=5):
+    """Open a connection to the server, without Nagle delays, for tests that write raw bytes."""
+    return _connect(*SERVER_ADDR, timeout)
+
+
+def read_response(sock):
+    """Read one response from a raw socket the caller keeps open for further requests."""
+    return _recv_response(sock, keep_alive=True)
+
+
+def parse_response(response):
+    """Split a response into (status line, headers dict, body bytes) in one pass; only the head is decoded."""
+    head, _, body = response.partition(b"\r\n\r\n")
+    status, *header_lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name] = value.strip()
+    return status, headers, body
+
+
+def parse_status(response):
+    """Status code of a response, read from its fixed place in the "HTTP/1.1 NNN" line; None if malformed."""
+    code = response[9:12]
+    return int(code) if response.startswith(b"HTTP/") and code.isdigit() else None
+
+
+def _send_buffers(sock, buffers):
+    """Write `buffers` in order, gathering them into as few sendmsg calls as the kernel allows."""
+    if not hasattr(sock, "sendmsg"):
+        # No sendmsg on Windows
+        sock.sendall(b"".join(buffers))
+        return
+    views = [memoryview(buffer) for buffer in buffers if buffer]
+    while views:
+        sent = sock.sendmsg(views)
+        # Drop what went out; a short write can end partway through a buffer.
+        while sent:
+            if sent >= len(views[0]):
+                sent -= len(views.pop(0))
+            else:
+                views[0] = views[0][sent:]
+                sent = 0
+
+
+def send_raw_request(*buffers, timeout=5):
+    """Send complete request bytes, given as one or more buffers, on a new connection.
+
+    Return the response bytes. A head and body passed separately go out in one
+    gathered write instead of being concatenated first.
+    """
+    try:
+        with raw_connection(timeout) as sock:
+            _send_buffers(sock, buffers)
+            return _recv_response(sock)
     except socket.error as e:
-        pytest.fail(f"Failed to send HTTP request: {e}")
\ No newline at end of file
+        pytest.fail(f"Failed to send HTTP request: {e}")
+
+
+async def _recv_response_async(reader, timeout, keep_alive=False):
+    """Asyncio counterpart of `_recv_response`."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    response = bytearray()
+    expected = None  # Total response size, once the headers tell us
+    while expected is None or len(response) < expected:
+        try:
+            chunk = await asyncio.wait_for(reader.read(65536), deadline - loop.time())
+        except asyncio.TimeoutError:
+            break
+        if not chunk:
+            break
+        response += chunk
+        if expected is None:
+            header_end = response.find(b'\r\n\r\n')
+            if header_end != -1:
+                match = _CONTENT_LENGTH.search(response, 0, header_end)
+                if match:
+                    expected = header_end + 4 + int(match.group(1))
+                elif keep_alive:
+                    expected = header_end + 4
+    return bytes(response)
+
+
+async def send_http_request_async(method, path, headers=None, body=None, timeout=5):
+    """Send HTTP request on its own connection from the running event loop."""
+    request = _cached_request(*_request_key(method, path, headers, body, False))
+    reader, writer = await asyncio.open_connection(*SERVER_ADDR)
+    try:
+        writer.write(request)
+        await writer.drain()
+        response = await _recv_response_async(reader, timeout)
+    finally:
+        writer.close()
+    return response
+
+
+async def read_response_async(reader, timeout=5):
+    """Read one response from an asyncio stream without waiting for the server to close it."""
+    return await _recv_response_async(reader, timeout, keep_alive=True)
+
+
+async def raw_send_async(payload, timeout=5):
+    """Send raw bytes on a new connection and return the response read back."""
+    # asyncio turns TCP_NODELAY on for its stream sockets by itself
+    reader, writer = await asyncio.open_connection(*SERVER_ADDR)
+    try:
+        writer.write(payload)
+        await writer.drain()
+        return await read_response_async(reader, timeout)
+    finally:
+        writer.close()
+
+
+_event_loop = None
+
+
+def run_concurrently(*coroutines, return_exceptions=False):
+    """Run coroutines together on the session's event loop and return their results in order."""
+    global _event_loop
+    if _event_loop is None:
+        _event_loop = asyncio.new_event_loop()
+
+    async def gather():
+        return await asyncio.gather(*coroutines, return_exceptions=return_exceptions)
+    return _event_loop.run_until_complete(gather())
@@ -1,5 +1,7 @@
 import os
+import shutil
 import subprocess
+from collections import namedtuple
 import pytest
 
 
@@ -12,43 +14,53 @@ def test_repository_structure():
     assert os.path.exists('main.py'), "main.py file not found"
 
 
-def test_git_setup():
-    """Test that git is properly configured and repository is set up."""
+GitInfo = namedtuple("GitInfo", ["version", "remotes", "branch", "status"])
+
+_GIT_SECTION = "--git-info-section--"
+
+
+@pytest.fixture(scope="session")
+def git_info():
+    """Collect everything the git tests need from a single shell invocation."""
+    script = f"; echo {_GIT_SECTION}; ".join([
+        "git --version",
+        "git remote -v",
+        "git branch --show-current",
+        "git status --porcelain",
+    ])
     try:
-        # Check if git is available
-        result = subprocess.run(['git', '--version'], 
-                              capture_output=True, text=True, check=True)
-        assert 'git version' in result.stdout.lower()
-        
-        # Check if we have a remote origin (indicating it's been cloned/forked)
-        result = subprocess.run(['git', 'remote', '-v'], 
-                              capture_output=True, text=True, check=True)
-        assert 'origin' in result.stdout, "No git remote 'origin' found"
-        
-        # Check if we're on main or master branch
-        result = subprocess.run(['git', 'branch', '--show-current'], 
-                              capture_output=True, text=True, check=True)
-        current_branch = result.stdout.strip()
-        assert current_branch in ['main', 'master'], f"Not on main/master branch, currently on: {current_branch}"
-        
+        # `set -e` makes the first failing git command fail the whole call.
+        result = subprocess.run(['bash', '-ec', script],
+                                capture_output=True, text=True, check=True)
     except subprocess.CalledProcessError as e:
-        pytest.fail(f"Git command failed: {e}")
+        if e.returncode == 127:
+            pytest.fail("Git is not installed or not in PATH")
+        pytest.fail(f"Git command failed: {e}\n{e.stderr}")
     except FileNotFoundError:
-        pytest.fail("Git is not installed or not in PATH")
+        pytest.fail("bash is not installed or not in PATH")
+
+    sections = [section.strip("\n") for section in result.stdout.split(f"{_GIT_SECTION}\n")]
+    return GitInfo(*sections)
+
+
+def test_git_setup(git_info):
+    """Test that git is properly configured and repository is set up."""
+    # Check if git is available
+    assert 'git version' in git_info.version.lower()
 
+    # Check if we have a remote origin (indicating it's been cloned/forked)
+    assert 'origin' in git_info.remotes, "No git remote 'origin' found"
 
-def test_can_commit():
+    # Check if we're on main or master branch
+    current_branch = git_info.branch.strip()
+    assert current_branch in ['main', 'master'], f"Not on main/master branch, currently on: {current_branch}"
+
+
+def test_can_commit(git_info):
     """Test that the repository allows commits (indicating proper setup)."""
-    try:
-        # Check git status to ensure we can interact with the repository
-        result = subprocess.run(['git', 'status', '--porcelain'], 
-                              capture_output=True, text=True, check=True)
-        
-        # The command should succeed (even if there are no changes)
-        # This indicates the repository is properly initialized
-        
-    except subprocess.CalledProcessError as e:
-        pytest.fail(f"Cannot check git status: {e}")
+    # git status --porcelain succeeded inside the fixture (even if there are no changes),
+    # which indicates the repository is properly initialized
+    assert git_info.status is not None
 
 
 def test_python_availability():
@@ -86,30 +98,12 @@ def test_main_py_exists():
 
 def test_networking_tools_available():
     """Test that basic networking debugging tools are available (optional)."""
-    tools_found = []
-    
-    # Test for curl (useful for debugging)
-    try:
-        subprocess.run(['curl', '--version'], 
-                      capture_output=True, text=True, check=True)
-        tools_found.append('curl')
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        pass
-    
-    # Test for netstat (useful for debugging)
-    try:
-        subprocess.run(['netstat', '--version'], 
-                      capture_output=True, text=True, check=True)
-        tools_found.append('netstat')
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    # Looking the tools up on PATH is enough for an informational check; no need to run them.
+    tools_found = [tool for tool in ('curl', 'netstat') if shutil.which(tool)]
+    if 'netstat' not in tools_found and shutil.which('ss'):
         # Try alternative commands
-        try:
-            subprocess.run(['ss', '--version'], 
-                          capture_output=True, text=True, check=True)
-            tools_found.append('ss')
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            pass
-    
+        tools_found.append('ss')
+
     # This test passes regardless, but provides useful information
     print(f"Available debugging tools: {', '.join(tools_found) if tools_found else 'None found'}")
-    assert True  # Always pass, just informational
\ No newline at end of file
+    assert True  # Always pass, just informational
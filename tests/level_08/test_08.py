@@ -1,223 +1,165 @@
-import tempfile
-import threading
-from conftest import http_server_process
-from conftest import send_http_request
+import mmap
 import os
-from conftest import http_server_process, send_http_request
-
-def test_create_new_file():
-    """Test basic file creation via POST."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        with http_server_process(directory=temp_dir):
-            # Send POST request with file content
-            filename = "testfile.txt"
-            content = "Hello, World!"
-            headers = {
-                "Content-Type": "application/octet-stream",
-                "Content-Length": str(len(content))
-            }
-            response = send_http_request(
-                "POST", 
-                f"/files/{filename}",
-                headers=headers,
-                body=content
-            )
-            
-            # Check response
-            assert response == "HTTP/1.1 201 Created\r\n\r\n", \
-                f"Expected 201 Created, got:\n{response}"
-            
-            # Verify file was created
-            created_file = os.path.join(temp_dir, filename)
-            assert os.path.exists(created_file), "File was not created"
-            
-            # Verify content
-            with open(created_file, "r") as f:
-                assert f.read() == content, "File content mismatch"
-
-def test_overwrite_existing_file():
-    """Test that POST overwrites existing files."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Create initial file
-        filename = "existing.txt"
-        initial_content = "Old content"
-        with open(os.path.join(temp_dir, filename), "w") as f:
-            f.write(initial_content)
-        
-        with http_server_process(directory=temp_dir):
-            # Send POST with new content
-            new_content = "New content"
-            headers = {
-                "Content-Type": "application/octet-stream",
-                "Content-Length": str(len(new_content))
-            }
-            response = send_http_request(
-                "POST",
-                f"/files/{filename}",
-                headers=headers,
-                body=new_content
-            )
-            
-            # Check response
-            assert response == "HTTP/1.1 201 Created\r\n\r\n"
-            
-            # Verify content was overwritten
-            with open(os.path.join(temp_dir, filename), "r") as f:
-                assert f.read() == new_content
-
-def test_create_file_with_binary_content():
-    """Test file creation with binary data."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        with http_server_process(directory=temp_dir):
-            filename = "binary.bin"
-            content = b'\x00\x01\x02\x03\xFF'
-            headers = {
-                "Content-Type": "application/octet-stream",
-                "Content-Length": str(len(content))
-            }
-            response = send_http_request(
-                "POST",
-                f"/files/{filename}",
-                headers=headers,
-                body=content,
-                binary=True
-            )
-            
-            assert response == "HTTP/1.1 201 Created\r\n\r\n"
-            
-            # Verify binary content
-            created_file = os.path.join(temp_dir, filename)
-            with open(created_file, "rb") as f:
-                assert f.read() == content
-
-def test_missing_content_length():
+import pytest
+from urllib.parse import unquote
+from conftest import HttpClient, raw_send_async, run_concurrently, send_http_request, send_raw_request
+
+# Under --dist loadgroup, one worker owns this module's upload server.
+pytestmark = [pytest.mark.xdist_group("level_08_files"), pytest.mark.file_io]
+
+CONCURRENT_UPLOADS = 3
+
+_CREATED = b"HTTP/1.1 201 Created\r\n\r\n"
+_BAD_REQUEST = b"HTTP/1.1 400 Bad Request\r\n\r\n"
+_FORBIDDEN = b"HTTP/1.1 403 Forbidden\r\n\r\n"
+_NOT_FOUND = b"HTTP/1.1 404 Not Found\r\n\r\n"
+
+# Every upload below differs only in filename and body, so the head is formatted from one template
+_POST_TEMPLATE = (
+    b"POST /files/%s HTTP/1.1\r\n"
+    b"Host: localhost:4221\r\n"
+    b"Content-Type: application/octet-stream\r\n"
+    b"Content-Length: %d\r\n"
+    b"\r\n"
+)
+
+
+def _post_file(name, body):
+    """Upload `body` as /files/`name` and return the response bytes."""
+    body = body if isinstance(body, bytes) else body.encode()
+    return send_raw_request(_POST_TEMPLATE % (name.encode(), len(body)), body)
+
+
+def _wire_post(name, body):
+    """Full wire bytes of an upload of `body` (bytes) as /files/`name`."""
+    return _POST_TEMPLATE % (name.encode(), len(body)) + body
+
+
+# Every upload the positive-path test makes: filename -> (body, content already
+# on disk or None), with the full request formatted once, at import.
+_UPLOADS = {
+    "testfile.txt": (b"Hello, World!", None),
+    "existing.txt": (b"New content", b"Old content"),
+    "binary.bin": (b'\x00\x01\x02\x03\xFF', None),
+    "empty.txt": (b"", None),
+    "file with spaces.txt": (b"content", None),
+}
+_UPLOAD_REQUESTS = {name: _wire_post(name, body) for name, (body, _) in _UPLOADS.items()}
+
+
+def _assert_file_contents(path, expected, message="File content mismatch"):
+    """Assert the file at `path` holds exactly `expected`; a missing file raises FileNotFoundError."""
+    expected = expected if isinstance(expected, bytes) else expected.encode()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            # An empty file can't be mapped
+            assert expected == b"", message
+            return
+        # Compare against the page cache directly, without reading into a buffer first
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            assert view == expected, message
+
+
+@pytest.mark.parametrize("filename", _UPLOADS)
+def test_post_file(server_with_tmpdir, module_tmpdir, filename):
+    """Test that POST creates the file, or overwrites an existing one, with the body."""
+    content, existing = _UPLOADS[filename]
+    path = os.path.join(module_tmpdir, filename)
+    if existing is not None:
+        with open(path, "wb") as f:
+            f.write(existing)
+
+    response = send_raw_request(_UPLOAD_REQUESTS[filename])
+    assert response == _CREATED, \
+        f"Expected 201 Created, got:\n{response.decode(errors='replace')}"
+
+    _assert_file_contents(path, content)
+
+def test_missing_content_length(server_with_tmpdir):
     """Test that missing Content-Length header returns 400."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        with http_server_process(directory=temp_dir):
-            response = send_http_request(
-                "POST",
-                "/files/test.txt",
-                headers={"Content-Type": "application/octet-stream"},
-                body="some content"
-            )
-            assert response == "HTTP/1.1 400 Bad Request\r\n\r\n", \
-                "Should require Content-Length header"
-
-def test_empty_file_creation():
-    """Test creating an empty file."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        with http_server_process(directory=temp_dir):
-            filename = "empty.txt"
-            headers = {
-                "Content-Type": "application/octet-stream",
-                "Content-Length": "0"
-            }
-            response = send_http_request(
-                "POST",
-                f"/files/{filename}",
-                headers=headers,
-                body=""
-            )
-            
-            assert response == "HTTP/1.1 201 Created\r\n\r\n"
-            
-            # Verify empty file
-            created_file = os.path.join(temp_dir, filename)
-            assert os.path.exists(created_file)
-            assert os.path.getsize(created_file) == 0
-
-def test_directory_traversal_protection():
+    response = send_http_request(
+        "POST",
+        "/files/test.txt",
+        headers={"Content-Type": "application/octet-stream"},
+        body="some content"
+    )
+    assert response == _BAD_REQUEST, \
+        "Should require Content-Length header"
+
+TRAVERSAL_PAYLOADS = [
+    "../outside.txt",
+    "../../outside.txt",
+    "sub/../../outside.txt",
+    "./../outside.txt",
+]
+
+# Only traversals once percent-decoded or taken as absolute. A server that does
+# neither just stores the literal name inside the directory, which is safe too,
+# so for these only the file landing outside the directory counts as a failure.
+_PROBE_NAME = "tcp_server_traversal_probe.txt"
+ENCODED_TRAVERSAL_PAYLOADS = [
+    f"..%2f{_PROBE_NAME}",
+    f"%2e%2e/{_PROBE_NAME}",
+    f"%2e%2e%2f{_PROBE_NAME}",
+    f"%2E%2E%2F{_PROBE_NAME}",
+    f"sub%2f..%2f..%2f{_PROBE_NAME}",
+    f"/tmp/{_PROBE_NAME}",
+    f"%2ftmp%2f{_PROBE_NAME}",
+]
+
+
+@pytest.fixture(scope="module")
+def traversal_client():
+    """One keep-alive connection shared by every traversal attempt in the sweep.
+
+    It connects on first use, once the test's own `server_with_tmpdir` is up.
+    """
+    with HttpClient() as client:
+        yield client
+
+
+@pytest.mark.parametrize("name", TRAVERSAL_PAYLOADS)
+def test_directory_traversal_protection(server_with_tmpdir, traversal_client, name):
     """Test that path traversal attempts are blocked."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        with http_server_process(directory=temp_dir):
-            # Try to create file outside the directory
-            response = send_http_request(
-                "POST",
-                "/files/../outside.txt",
-                headers={
-                    "Content-Type": "application/octet-stream",
-                    "Content-Length": "5"
-                },
-                body="hello"
-            )
-            assert response == "HTTP/1.1 403 Forbidden\r\n\r\n", \
-                "Should block path traversal attempts"
-
-def test_filename_with_spaces():
-    """Test filenames with spaces."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        with http_server_process(directory=temp_dir):
-            filename = "file with spaces.txt"
-            content = "content"
-            headers = {
-                "Content-Type": "application/octet-stream",
-                "Content-Length": str(len(content))
-            }
-            response = send_http_request(
-                "POST",
-                f"/files/{filename}",
-                headers=headers,
-                body=content
-            )
-            
-            assert response == "HTTP/1.1 201 Created\r\n\r\n"
-            
-            # Verify file was created with spaces
-            created_file = os.path.join(temp_dir, filename)
-            assert os.path.exists(created_file)
-
-def test_concurrent_file_creation():
+    # Try to create file outside the directory
+    response = traversal_client.request(_POST_TEMPLATE % (name.encode(), 5) + b"hello")
+    assert response == _FORBIDDEN, \
+        f"Should block path traversal attempt {name!r}"
+
+
+@pytest.mark.parametrize("name", ENCODED_TRAVERSAL_PAYLOADS)
+def test_encoded_traversal_stays_inside_directory(server_with_tmpdir, module_tmpdir, traversal_client, name):
+    """Test that encoded or absolute filenames never write outside the directory."""
+    # Where a server that decodes the name but doesn't check the result would write
+    outside = os.path.normpath(os.path.join(module_tmpdir, unquote(name)))
+    if os.path.exists(outside):
+        os.remove(outside)
+
+    traversal_client.request(_POST_TEMPLATE % (name.encode(), 5) + b"hello")
+    assert not os.path.exists(outside), \
+        f"Traversal attempt {name!r} wrote {outside}"
+
+def test_concurrent_file_creation(server_with_tmpdir, module_tmpdir):
     """Test multiple concurrent file uploads."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        with http_server_process(directory=temp_dir):
-            results = []
-            threads = []
-            
-            def make_request(filename, content):
-                headers = {
-                    "Content-Type": "application/octet-stream",
-                    "Content-Length": str(len(content))
-                }
-                response = send_http_request(
-                    "POST",
-                    f"/files/{filename}",
-                    headers=headers,
-                    body=content
-                )
-                results.append((filename, response))
-            
-            # Create and start threads
-            for i in range(3):
-                filename = f"file_{i}.txt"
-                content = f"content {i}"
-                t = threading.Thread(target=make_request, args=(filename, content))
-                threads.append(t)
-                t.start()
-            
-            # Wait for all threads
-            for t in threads:
-                t.join()
-            
-            # Verify responses
-            assert len(results) == 3, "Not all requests completed"
-            for filename, response in results:
-                assert response == "HTTP/1.1 201 Created\r\n\r\n", \
-                    f"File {filename} creation failed"
-                
-                # Verify file was created
-                assert os.path.exists(os.path.join(temp_dir, filename))
-
-def test_post_without_directory_flag():
+    # Format every upload up front so the coroutines only send and receive
+    filenames = [f"file_{i}.txt" for i in range(CONCURRENT_UPLOADS)]
+    payloads = [_wire_post(filename, f"content {i}".encode()) for i, filename in enumerate(filenames)]
+    # All uploads run as coroutines on one event loop, no worker threads needed;
+    # responses[i] answers payloads[i], so nothing is appended from the workers
+    responses = run_concurrently(*map(raw_send_async, payloads))
+    
+    # Verify responses
+    assert len(responses) == CONCURRENT_UPLOADS, "Not all requests completed"
+    for filename, response in zip(filenames, responses):
+        assert response == _CREATED, \
+            f"File {filename} creation failed"
+        
+        # Verify file was created
+        assert os.path.exists(os.path.join(module_tmpdir, filename))
+
+def test_post_without_directory_flag(server):
     """Test that POST /files returns 404 when no directory specified."""
-    with http_server_process():  # No directory flag
-        response = send_http_request(
-            "POST",
-            "/files/test.txt",
-            headers={
-                "Content-Type": "application/octet-stream",
-                "Content-Length": "5"
-            },
-            body="hello"
-        )
-        assert response == "HTTP/1.1 404 Not Found\r\n\r\n", \
-            "Files endpoint should be disabled when no directory specified"
\ No newline at end of file
+    response = _post_file("test.txt", "hello")
+    assert response == _NOT_FOUND, \
+        "Files endpoint should be disabled when no directory specified"
\ No newline at end of file